@@ -132,6 +132,33 @@ class GameResultDB:
             print(f"Error saving game result: {e}")
             return None
     
+    def save_game_result_with_checkpoint(self, user_id, ai_word: str, human_word: str, score: int):
+        """Saves a game result entry and the user's checkpoint for it in a single transaction.
+        
+        Args:
+            user_id (str): User ID for whom the checkpoint is saved.
+            ai_word (str): Word generated by AI.
+            human_word (str): Word entered by the human user.
+            score (int): Score indicating similarity.
+        
+        Returns:
+            int: Primary key of the newly created GameResult entry, or None on failure.
+        """
+        session = self.get_session()
+        try:
+            new_result = GameResult(ai_word=ai_word, human_word=human_word, score=score)
+            session.add(new_result)
+            session.flush()  # Assigns the primary key without committing
+            session.add(Checkpoint(uid=user_id, pid=new_result.pid))
+            session.commit()
+            return new_result.pid
+        except Exception as e:
+            session.rollback()
+            print(f"Error saving game result with checkpoint: {e}")
+            return None
+        finally:
+            session.close()
+
     def save_game_status(self, user_id):
         """Saves or initializes game status for a user.
         
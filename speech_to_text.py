@@ -1,12 +1,95 @@
-import speech_recognition as sr
-from pydub import AudioSegment, silence
+from faster_whisper import WhisperModel
+from pydub import AudioSegment
+import numpy as np
 import os
+import string
+import subprocess
+import asyncio
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import requests
-from datetime import datetime
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from urllib.parse import urlparse
 import mimetypes
 import validators
 
 
+# Shared HTTP session so audio requests reuse pooled keep-alive connections
+_SESSION = requests.Session()
+_ADAPTER = HTTPAdapter(pool_connections=32, pool_maxsize=64, max_retries=Retry(total=2, backoff_factor=0.2))
+_SESSION.mount("https://", _ADAPTER)
+_SESSION.mount("http://", _ADAPTER)
+_SESSION.headers.update({"Accept-Encoding": "gzip, deflate", "User-Agent": "WordGame/1.0"})
+
+# Audio formats accepted for transcription
+_SUPPORTED_EXTENSIONS = frozenset({"mp3", "ogg", "wav", "flac", "m4a"})
+
+# Largest audio file (in bytes) accepted for download
+_MAX_AUDIO_BYTES = 20_000_000
+
+# Local speech recognition model, loaded on first use and shared by all transcriptions
+_MODEL = None
+_MODEL_LOCK = threading.Lock()
+
+# Sample rate expected by the Whisper model
+_MODEL_SAMPLE_RATE = 16000
+
+
+def _get_model():
+    """Return the shared Whisper model, loading it on first use.
+
+    Returns:
+        WhisperModel: The int8-quantised ``base.en`` model running on the CPU.
+    """
+    global _MODEL
+    if _MODEL is None:
+        with _MODEL_LOCK:
+            if _MODEL is None:
+                _MODEL = WhisperModel("base.en", device="cpu", compute_type="int8")
+    return _MODEL
+
+
+@functools.lru_cache(maxsize=1024)
+def _guess_extension(url):
+    """Guess the audio file extension for a URL, caching the result per URL.
+
+    The extension is taken from the URL path (ignoring any query string) and a
+    HEAD request is only issued when the path has no extension.
+
+    Args:
+        url (str): URL of the audio file.
+
+    Returns:
+        str: The file extension without the leading dot.
+    """
+    ext = os.path.splitext(urlparse(url).path)[1].replace(".", "")
+    if not ext:
+        content_type = _SESSION.head(url, allow_redirects=True, timeout=(5, 30)).headers["content-type"]
+        ext = mimetypes.guess_extension(content_type).replace(".", "")
+    return ext
+
+
+@functools.lru_cache(maxsize=512)
+def _url_ok(url, ext):
+    """Check, with caching, that a URL is well formed and points to a supported audio format.
+
+    Args:
+        url (str): URL of the audio file.
+        ext (str): File extension of the audio file.
+
+    Returns:
+        bool: True if the URL is valid and the format is supported; False otherwise.
+    """
+    return ext in _SUPPORTED_EXTENSIONS and bool(validators.url(url))
+
+
+# Silence (in ms) kept on either side of each non-silent chunk, matching pydub's default
+_KEEP_SILENCE_MS = 100
+
+
 class CustomException(Exception):
     """A custom exception class for handling specific error types in the transcription process."""
     
@@ -28,24 +111,28 @@ class CustomException(Exception):
 class Transcriber:
     """Handles downloading, processing, and transcribing audio files from a given URL."""
     
-    def __init__(self, url, silence_thresh=-50, min_silence_len=500, sample_rate=44100):
+    def __init__(self, url, silence_thresh=-50, min_silence_len=500, sample_rate=16000, max_unsplit_duration=10):
         """Initialize the Transcriber with the audio URL and optional audio processing parameters.
 
         Args:
             url (str): URL of the audio file to download and transcribe.
             silence_thresh (int, optional): Silence threshold (in dB) for detecting silence. Defaults to -50.
             min_silence_len (int, optional): Minimum length of silence (in ms) to split audio chunks. Defaults to 500.
-            sample_rate (int, optional): Sample rate for audio processing. Defaults to 44100.
+            sample_rate (int, optional): Sample rate for audio processing. Defaults to 16000,
+                the rate speech recognition operates at.
+            max_unsplit_duration (int, optional): Longest audio (in seconds) transcribed in a single request
+                without silence splitting. Defaults to 10.
         """
         self.url = url
         self.audio_folder = "audio"
-        self.timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        # Process ID plus a nanosecond counter keeps file names unique across concurrent requests and workers
+        self.timestamp = f"{os.getpid()}_{time.monotonic_ns():x}"
         self.file_extension = self.get_file_extension()
         self.file_path = os.path.join(self.audio_folder, f"downloaded_audio_{self.timestamp}.{self.file_extension}")
-        self.temp_wav_file = f"temp_audio_{self.timestamp}.wav"
         self.silence_thresh = silence_thresh
         self.min_silence_len = min_silence_len
         self.sample_rate = sample_rate
+        self.max_unsplit_duration = max_unsplit_duration
 
     def get_file_extension(self):
         """Retrieve the file extension from the URL or infer from the content type.
@@ -57,10 +144,7 @@ class Transcriber:
             CustomException: If unable to determine the file extension.
         """
         try:
-            ext = os.path.splitext(self.url)[-1].replace(".", "")
-            if not ext:
-                ext = mimetypes.guess_extension(requests.head(self.url).headers["content-type"]).replace(".", "")
-            return ext
+            return _guess_extension(self.url)
         except Exception as e:
             raise CustomException(f"Error determining file extension: {str(e)}", "audio_error")
 
@@ -70,7 +154,7 @@ class Transcriber:
         Returns:
             bool: True if URL is valid and audio format is supported; False otherwise.
         """
-        return self.file_extension in ['mp3', 'avi', 'ogg'] and validators.url(self.url)
+        return _url_ok(self.url, self.file_extension)
 
     def download_audio(self):
         """Download audio file from the URL and save it locally.
@@ -80,17 +164,41 @@ class Transcriber:
         """
         try:
             if not self.is_valid_url():
-                raise CustomException("Invalid URL. Supported formats are .mp3, .avi, and .ogg.", "audio_error")
+                raise CustomException("Invalid URL. Supported formats are .mp3, .ogg, .wav, .flac, and .m4a.", "audio_error")
 
             if not os.path.exists(self.audio_folder):
                 os.makedirs(self.audio_folder)
 
-            response = requests.get(self.url)
-            if response.status_code == 200:
+            # Stream the response to disk so only one chunk is held in memory at a time
+            with _SESSION.get(self.url, stream=True, timeout=(5, 30)) as response:
+                if response.status_code != 200:
+                    raise CustomException(f"Failed to download audio file. Status code: {response.status_code}", "audio_error")
+
+                content_length = int(response.headers.get("Content-Length", "0"))
+                if content_length > _MAX_AUDIO_BYTES:
+                    raise CustomException("Audio file is too large to download.", "audio_error")
+
                 with open(self.file_path, "wb") as audio_file:
-                    audio_file.write(response.content)
-            else:
-                raise CustomException(f"Failed to download audio file. Status code: {response.status_code}", "audio_error")
+                    # Reserve the full file size up front where the platform supports it
+                    if content_length and hasattr(os, "posix_fallocate"):
+                        try:
+                            os.posix_fallocate(audio_file.fileno(), 0, content_length)
+                        except OSError:
+                            pass
+
+                    downloaded = 0
+                    for chunk in response.iter_content(chunk_size=65536):
+                        downloaded += len(chunk)
+                        # Content-Length may be missing or wrong, so enforce the limit on the bytes received
+                        if downloaded > _MAX_AUDIO_BYTES:
+                            raise CustomException("Audio file is too large to download.", "audio_error")
+                        audio_file.write(chunk)
+
+                    # Drop any preallocated space the body did not fill
+                    audio_file.truncate()
+
+        except CustomException as e:
+            raise e
 
         except requests.RequestException as e:
             raise CustomException(f"Network error occurred: {str(e)}", "network_error")
@@ -99,15 +207,30 @@ class Transcriber:
             raise CustomException(f"Unexpected error occurred: {str(e)}", "audio_error")
 
     def convert_to_wav(self):
-        """Convert the downloaded audio file to WAV format with specified sample rate.
+        """Decode the downloaded audio file to 16-bit mono PCM at the specified sample rate in memory.
+
+        Returns:
+            AudioSegment: The decoded audio, ready for silence removal and transcription.
 
         Raises:
             CustomException: If the conversion process fails.
         """
         try:
-            sound = AudioSegment.from_file(self.file_path)
-            sound = sound.set_frame_rate(self.sample_rate)
-            sound.export(self.temp_wav_file, format="wav")
+            # A single ffmpeg run decodes and resamples straight to stdout as raw samples,
+            # so nothing is written to disk or parsed back from a WAV container
+            result = subprocess.run(
+                [
+                    "ffmpeg", "-hide_banner", "-loglevel", "error",
+                    "-i", self.file_path,
+                    "-ar", str(self.sample_rate), "-ac", "1", "-sample_fmt", "s16",
+                    "-f", "s16le", "pipe:1"
+                ],
+                capture_output=True,
+                check=True
+            )
+            return AudioSegment(data=result.stdout, sample_width=2, frame_rate=self.sample_rate, channels=1)
+        except subprocess.CalledProcessError as e:
+            raise CustomException(f"Error converting audio to WAV: {e.stderr.decode(errors='replace').strip()}", "audio_error")
         except Exception as e:
             raise CustomException(f"Error converting audio to WAV: {str(e)}", "audio_error")
 
@@ -124,42 +247,61 @@ class Transcriber:
             CustomException: If silence removal fails.
         """
         try:
-            non_silent_chunks = silence.split_on_silence(
-                audio,
-                min_silence_len=self.min_silence_len,
-                silence_thresh=self.silence_thresh
-            )
+            # The decoded audio is 16-bit PCM, so the raw samples can be scanned without re-running ffmpeg
+            samples = np.frombuffer(audio.raw_data, dtype=np.int16).astype(np.int64)
+            window = int(self.min_silence_len * audio.frame_rate / 1000)
+            if window == 0 or len(samples) < window:
+                return [audio]
+
+            # Mean square of every window in O(N) from a running sum of squared samples
+            energy = np.concatenate(([0], np.cumsum(samples * samples)))
+            mean_square = (energy[window:] - energy[:-window]) / window
+            threshold = (10 ** (self.silence_thresh / 10)) * audio.max_possible_amplitude ** 2
+            silent_windows = (mean_square < threshold).astype(np.int8)
+
+            # Runs of silent window starts; each run covers samples [start, end - 1 + window)
+            edges = np.diff(np.concatenate(([0], silent_windows, [0])))
+            run_starts = np.flatnonzero(edges == 1)
+            run_ends = np.flatnonzero(edges == -1) - 1 + window
+
+            non_silent_chunks = []
+            chunk_start = 0
+            for silence_start, silence_end in zip(run_starts.tolist(), run_ends.tolist()):
+                silence_start = silence_start * 1000 // audio.frame_rate
+                if silence_start > chunk_start:
+                    non_silent_chunks.append(audio[max(0, chunk_start - _KEEP_SILENCE_MS):silence_start + _KEEP_SILENCE_MS])
+                chunk_start = max(chunk_start, silence_end * 1000 // audio.frame_rate)
+
+            if chunk_start < len(audio):
+                non_silent_chunks.append(audio[max(0, chunk_start - _KEEP_SILENCE_MS):])
             return non_silent_chunks
         except Exception as e:
             raise CustomException(f"Error removing silence: {str(e)}", "audio_error")
 
-    def transcribe_audio_segment(self, audio_segment, chunk_number):
-        """Transcribe a single audio segment using Google Speech Recognition API.
+    def transcribe_audio_segment(self, audio_segment):
+        """Transcribe a single audio segment using the local Whisper model.
 
         Args:
             audio_segment (AudioSegment): An audio segment to be transcribed.
-            chunk_number (int): The sequence number of the audio chunk being transcribed.
 
         Returns:
             str: Transcribed text for the audio segment.
 
         Raises:
-            CustomException: If API request for transcription fails.
+            CustomException: If the transcription fails.
         """
-        recognizer = sr.Recognizer()
-        temp_segment = f"temp_segment_{self.timestamp}_{chunk_number}.wav"
-        audio_segment.export(temp_segment, format="wav")
-
         try:
-            with sr.AudioFile(temp_segment) as source:
-                audio_data = recognizer.record(source)
-                return recognizer.recognize_google(audio_data, language="en-IN")
-        except sr.UnknownValueError:
-            return "[Unintelligible]"
-        except sr.RequestError as e:
-            raise CustomException(f"API request error: {e}", "audio_error")
-        finally:
-            os.remove(temp_segment)
+            audio_segment = audio_segment.set_frame_rate(_MODEL_SAMPLE_RATE).set_channels(1).set_sample_width(2)
+            samples = np.frombuffer(audio_segment.raw_data, dtype=np.int16).astype(np.float32) / 32768.0
+
+            segments, _ = _get_model().transcribe(samples, language="en", beam_size=1, vad_filter=False)
+            text = " ".join(segment.text.strip() for segment in segments)
+        except Exception as e:
+            raise CustomException(f"Transcription error: {e}", "audio_error")
+
+        # Whisper punctuates its output, e.g. " Apple."
+        text = text.strip().strip(string.punctuation)
+        return text if text else "[Unintelligible]"
 
     def transcribe(self):
         """Full transcription process including downloading, processing, and transcribing the audio file.
@@ -176,20 +318,40 @@ class Transcriber:
         try:
             # Download and prepare audio
             self.download_audio()
-            self.convert_to_wav()
+            sound = self.convert_to_wav()
 
-            # Load the WAV file and remove silence
-            sound = AudioSegment.from_wav(self.temp_wav_file)
-            non_silent_chunks = self.remove_silence(sound)
+            # A single spoken word is short enough to transcribe whole,
+            # so silence splitting is only needed for longer recordings
+            if sound.duration_seconds > self.max_unsplit_duration:
+                non_silent_chunks = self.remove_silence(sound)
+            else:
+                non_silent_chunks = [sound]
 
-            # Transcribe each non-silent chunk
-            for i, chunk in enumerate(non_silent_chunks):
+            # Transcribe the non-silent chunks concurrently, keeping their original order
+            if non_silent_chunks:
+                results = [None] * len(non_silent_chunks)
+                executor = ThreadPoolExecutor(max_workers=min(8, len(non_silent_chunks)))
                 try:
-                    transcribed_text = self.transcribe_audio_segment(chunk, i+1)
+                    futures = {
+                        executor.submit(self.transcribe_audio_segment, chunk): i
+                        for i, chunk in enumerate(non_silent_chunks)
+                    }
+                    total_words = 0
+                    for future in as_completed(futures):
+                        transcribed_text = future.result()
+                        results[futures[future]] = transcribed_text
+                        if transcribed_text != "[Unintelligible]":
+                            total_words += len(transcribed_text.split())
+
+                        # Only a single word is accepted, so stop as soon as a second one is heard
+                        if total_words > 1:
+                            raise CustomException("The audio contains multiple words.", "invalid_input")
+                finally:
+                    executor.shutdown(wait=False, cancel_futures=True)
+
+                for transcribed_text in results:
                     if transcribed_text != "[Unintelligible]":
                         transcript.append(transcribed_text)
-                except CustomException as e:
-                    raise e
 
             # Join all transcribed text into a single string
             final_transcript = " ".join(transcript).strip()
@@ -204,10 +366,20 @@ class Transcriber:
             raise e
 
         finally:
-            # Clean up temporary audio files
-            if os.path.exists(self.temp_wav_file):
-                os.remove(self.temp_wav_file)
+            # Clean up the downloaded audio file
             if os.path.exists(self.file_path):
                 os.remove(self.file_path)
 
         return final_transcript
+
+    async def transcribe_async(self):
+        """Run the blocking transcription process in the event loop's default executor.
+
+        Returns:
+            str: Final transcribed text from the audio file.
+
+        Raises:
+            CustomException: Propagated from :meth:`transcribe`.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.transcribe)
@@ -1,15 +1,29 @@
 from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
-from pydantic import BaseModel, root_validator
+from pydantic import BaseModel, model_validator
 from fastapi.middleware.cors import CORSMiddleware
 from word_game_setup import WordGame, MultipleWordsError, InvalidWordError, SameInputError, AIWordError
 from speech_to_text import Transcriber, CustomException
 from db_setup import DuplicateUserError
 from sqlalchemy.exc import SQLAlchemyError
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+import asyncio
 import re
 
+# Matches every character that is not an English letter
+_NONALPHA = re.compile(r'[^a-zA-Z]')
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Size the default executor used to run blocking transcription and database work off the event loop."""
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=32))
+    yield
+
+
 # Initialize FastAPI app
-app = FastAPI(title="Word Game API")
+app = FastAPI(title="Word Game API", lifespan=lifespan)
 
 # Allow all origins
 app.add_middleware(
@@ -23,6 +37,9 @@ app.add_middleware(
 # Initialize the word game instance
 word_game = WordGame()
 
+# WordGame keeps shared in-memory state, so its calls run one at a time in worker threads
+word_game_lock = asyncio.Lock()
+
 
 class MissingFieldError(Exception):
     """Custom exception raised when a required field is missing in the request."""
@@ -50,21 +67,24 @@ class WordPair(BaseModel):
     audio_url: str | None = None
     incoming_score: int
 
-    @root_validator(pre=True)
+    @model_validator(mode="before")
+    @classmethod
     def check_empty(cls, values):
-        """Validator to ensure the request body is not empty.
+        """Validator to ensure the request body is not empty and has the required fields.
 
         Args:
             values (dict): Dictionary of values passed to the request.
 
         Raises:
-            MissingFieldError: If all values are missing.
+            MissingFieldError: If the body is empty or user_id or ai_word is missing.
 
         Returns:
             dict: The validated values.
         """
-        if not any(values.values()):
+        if not values:
             raise MissingFieldError("Request body cannot be empty.")
+        if isinstance(values, dict) and (not values.get("user_id") or not values.get("ai_word")):
+            raise MissingFieldError("user_id and ai_word are required.")
         return values
 
 
@@ -104,17 +124,18 @@ async def start_game(init_game: Initgame):
     print(f"Received request to start game for user: {user_id}")
 
     try:
-        # Check if the user already has an active game initialized
-        word_game.user_authentication(user_id)
-        
-        # Proceed with game initialization since user is not a duplicate
-        word_game.initialize_game(user_id)
-        
-        # Get the first AI word to send to the user
-        first_ai_word = word_game.throw_word_to_user(user_id)
-        
-        # Save the thrown word to the database
-        word_game.save_thrown_word_to_db(user_id, first_ai_word)
+        async with word_game_lock:
+            # Check if the user already has an active game initialized
+            await asyncio.to_thread(word_game.user_authentication, user_id)
+
+            # Proceed with game initialization since user is not a duplicate
+            await asyncio.to_thread(word_game.initialize_game, user_id)
+
+            # Get the first AI word to send to the user
+            first_ai_word = await asyncio.to_thread(word_game.throw_word_to_user, user_id)
+
+            # Save the thrown word to the database
+            await asyncio.to_thread(word_game.save_thrown_word_to_db, user_id, first_ai_word)
         
         # If no word is available, inform the client
         if not first_ai_word:
@@ -161,20 +182,14 @@ async def play_word_game(word_pair: WordPair):
             if " " in human_word:
                 raise MultipleWordsError("The input contains multiple words.")
             
-            if '"' in human_word:
-                human_word = human_word.replace('"', "")
+            # Strip quotes and other special characters in a single pass
+            cleaned_word = _NONALPHA.sub('', human_word)
 
-            # Check if the human word contains only special characters
-            if not any(char.isalnum() for char in human_word):
-                raise InvalidWordError("The input word contains only special characters.")
+            # Reject words that have no letters left once special characters are removed
+            if not cleaned_word:
+                raise InvalidWordError("The input word does not contain any letters.")
 
-            # Check if the human word contains special characters along with alphabets
-            if any(char.isalpha() for char in human_word):
-                # Remove special characters from the word
-                cleaned_word = re.sub(r'[^a-zA-Z]', '', human_word)
-                
-                # If cleaned word is not empty, assign it to human_word
-                human_word = cleaned_word
+            human_word = cleaned_word
 
         except MultipleWordsError as e:
             return {"status": 0, "error_type": "invalid_input", "detail": str(e)}
@@ -184,8 +199,8 @@ async def play_word_game(word_pair: WordPair):
 
     elif audio_url:
         try:
-            transcriber = Transcriber(audio_url)
-            transcribed_text = transcriber.transcribe()
+            transcriber = await asyncio.to_thread(Transcriber, audio_url)
+            transcribed_text = await transcriber.transcribe_async()
 
             if transcribed_text == "[Unintelligible]":
                 raise CustomException("The audio was unclear. Please try again.", "speech_to_text_error")
@@ -212,7 +227,10 @@ async def play_word_game(word_pair: WordPair):
         }
 
     try:
-        result = word_game.get_similarity_score_with_next_word(user_id, ai_word, human_word, score=incoming_score)
+        async with word_game_lock:
+            result = await asyncio.to_thread(
+                word_game.get_similarity_score_with_next_word, user_id, ai_word, human_word, score=incoming_score
+            )
 
         if "error" in result:
             return {
@@ -261,6 +279,7 @@ async def end_game(end_game: Endgame):
         dict: A dictionary indicating successful termination of the game.
     """
     user_id = end_game.user_id
-    word_game.clear_user_data(user_id) 
-    word_game.clear_user_entries(user_id)
+    async with word_game_lock:
+        word_game.clear_user_data(user_id)
+        await asyncio.to_thread(word_game.clear_user_entries, user_id)
     return {"status": 1, "message": "Terminate the game."}
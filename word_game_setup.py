@@ -1,15 +1,70 @@
+import os
 import random
 import torch
 import csv
+import numpy as np
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
 from db_setup import GameResultDB
 
 
 # Database setup
 db = GameResultDB()  # Create an instance of the GameResultDB
 db.create_table()
-db_session = db.get_session()  # Get the session
+
+# Sentence embedding model and its ONNX exports used on CPU, from most to least specialised
+MODEL_NAME = 'all-MiniLM-L6-v2'
+ONNX_VNNI_MODEL_FILE = 'onnx/model_qint8_avx512_vnni.onnx'
+ONNX_AVX2_MODEL_FILE = 'onnx/model_quint8_avx2.onnx'
+ONNX_MODEL_FILE = 'onnx/model.onnx'
+
+# Fixed token length for the compiled CUDA encode path; single words never come close
+COMPILED_SEQ_LENGTH = 16
+
+# Number of non-pool word embeddings kept in memory
+EMBEDDING_CACHE_SIZE = 10000
+
+# Number of scored word pairs kept in memory
+SCORE_CACHE_SIZE = 100000
+
+
+def _detect_device():
+    """Pick the fastest available torch device: CUDA, then Apple MPS, then CPU.
+
+    Returns:
+        torch.device: The device to run the embedding model on.
+    """
+    if torch.cuda.is_available():
+        return torch.device('cuda')
+    if torch.backends.mps.is_available():
+        return torch.device('mps')
+    return torch.device('cpu')
+
+
+def _select_onnx_model_file():
+    """Pick the ONNX export whose quantized kernels the host CPU runs exactly.
+
+    The signed int8 export needs VNNI; without it the int8 dot products can saturate and
+    shift scores. AVX2-only hosts get the unsigned int8 export and anything else FP32.
+
+    Returns:
+        str: Path of the ONNX file inside the model repository.
+    """
+    try:
+        with open('/proc/cpuinfo') as cpuinfo:
+            flags = set()
+            for line in cpuinfo:
+                if line.startswith('flags'):
+                    flags.update(line.split(':', 1)[1].split())
+                    break
+    except OSError:
+        return ONNX_MODEL_FILE
+    if 'avx512_vnni' in flags:
+        return ONNX_VNNI_MODEL_FILE
+    if 'avx2' in flags:
+        return ONNX_AVX2_MODEL_FILE
+    return ONNX_MODEL_FILE
 
 
 class MultipleWordsError(Exception):
@@ -68,20 +123,102 @@ class WordGame:
     """Main class for the word game, handling word selection, scoring, and database interactions."""
 
     def __init__(self, word_csv_path='words.csv'):
-        """Initialize the WordGame instance with preloaded words and embeddings.
+        """Initialize the WordGame instance with preloaded words.
+
+        The embedding model and the pool word embeddings are loaded lazily on first use,
+        so database-only code paths never pay for them.
 
         Args:
             word_csv_path (str): Path to the CSV file containing words for different levels.
         """
-        self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
-        self.model = SentenceTransformer('all-MiniLM-L6-v2').to(self.device)
-        
+        self.device = _detect_device()
+        self._model = None
+        self._word_emb = None
+
         # Load words from the CSV file, separated by levels
         self.level1_words, self.level2_words, self.level3_words = self.load_words_from_csv(word_csv_path)
+
+        # Lowercase form of every pool word, so AI words are never re-lowercased per request
+        self.word_lower = {word: word.lower() for word in self.level1_words + self.level2_words + self.level3_words}
+
+        self.embedding_cache = OrderedDict()  # LRU cache for human word embeddings
+        self.score_cache = OrderedDict()  # LRU cache of (ai_word, human_word) -> (pid, score) from the database
+        self._writer = ThreadPoolExecutor(max_workers=1)  # Background writer for writes the response does not wait on
         self.flag = 0
         self.user_data = {}
         self.updated_score = 0  # Track the total score
 
+    @property
+    def model(self):
+        """SentenceTransformer: The embedding model, loaded on first access."""
+        if self._model is None:
+            self._model = self.load_model()
+
+            # Direct handles on the tokenizer and transformer for the low-overhead encode path
+            self._tokenizer = self._model.tokenizer
+            self._auto_model = self._model[0].auto_model
+            self._embed_tokens = self.embed_tokens
+            if self.device.type == 'cuda':
+                # Fuse the transformer's last layer with pooling and normalization; inputs are padded to a
+                # fixed length so the static shapes never trigger recompiles. The default mode leaves CUDA
+                # graphs off, which are recorded per thread while encodes run on any executor worker.
+                # CPU and MPS gain little.
+                self._embed_tokens = torch.compile(self.embed_tokens, dynamic=False)
+
+                # Compile both shapes a similarity check uses (one or two missing words) up front,
+                # so no request pays for it while holding the game lock
+                for batch_size in (1, 2):
+                    inputs = self._tokenizer(
+                        ['warmup'] * batch_size, padding='max_length', truncation=True,
+                        max_length=COMPILED_SEQ_LENGTH, return_tensors='pt'
+                    ).to(self.device)
+                    with torch.inference_mode():
+                        self._embed_tokens(dict(inputs))
+        return self._model
+
+    @property
+    def word_emb(self):
+        """dict: Unit-length embeddings of every pool word, computed in one batch on first access."""
+        if self._word_emb is None:
+            all_words = list(dict.fromkeys(self.level1_words + self.level2_words + self.level3_words))
+            embeddings = self.encode_words(all_words, batch_size=64) if all_words else []
+            self._word_emb = dict(zip(all_words, embeddings))
+        return self._word_emb
+
+    def load_model(self):
+        """Load the SentenceTransformer model in the fastest form for the selected device.
+
+        Returns:
+            SentenceTransformer: The embedding model.
+        """
+        if self.device.type == 'cpu':
+            # ONNX Runtime is only needed for the CPU backend, so GPU hosts never import it
+            import onnxruntime
+
+            # Size ONNX Runtime's thread pools; one inter-op thread avoids oversubscription
+            session_options = onnxruntime.SessionOptions()
+            session_options.intra_op_num_threads = min(8, os.cpu_count() or 1)
+            session_options.inter_op_num_threads = 1
+
+            # ONNX Runtime export matched to the CPU; the downloaded file is cached on disk by the Hugging Face hub
+            model = SentenceTransformer(
+                MODEL_NAME,
+                backend='onnx',
+                model_kwargs={'file_name': _select_onnx_model_file(), 'session_options': session_options},
+            )
+        else:
+            model = SentenceTransformer(MODEL_NAME).to(self.device)
+            if self.device.type == 'cuda':
+                # Half precision halves memory traffic; cosine scores are insensitive to the rounding.
+                # MPS is left in FP32 since not every op supports half there.
+                model.half()
+
+        # The model is only used for inference, so never track gradients for it
+        model.eval()
+        for parameter in model.parameters():
+            parameter.requires_grad_(False)
+        return model
+
     def initialize_user_word_pool(self, user_id):
         """Initialize or reset the word pool and used words for the specified user.
 
@@ -90,11 +227,42 @@ class WordGame:
         """
         self.user_data[user_id] = {
             'word_pool': self.level1_words[:],  # Start with level 1 words
+            'used_set': set(self.get_used_words_by_user_id(user_id)),  # In-memory mirror of the used words table
             'level2_merged': False,
             'level3_merged': False,
             'current_level': 1,
             'last_thrown_word': None
         }
+        self.build_pool_arrays(self.user_data[user_id])
+
+    def build_pool_arrays(self, user_info):
+        """Rebuild the array form of the user's word pool after the pool changes.
+
+        The unique pool words are kept in a fixed numpy array with a boolean mask of the
+        words still available, so picking a word never rebuilds a list of candidates.
+
+        Args:
+            user_info (dict): The in-memory game data of the user.
+        """
+        unique_words = list(dict.fromkeys(user_info['word_pool']))
+        used_set = user_info['used_set']
+        user_info['pool_arr'] = np.array(unique_words, dtype=object)
+        user_info['pool_index'] = {word: i for i, word in enumerate(unique_words)}
+        user_info['live_mask'] = np.fromiter((word not in used_set for word in unique_words), dtype=bool, count=len(unique_words))
+
+    def mark_word_used(self, user_id, word):
+        """Record a word as used in the user's in-memory mirror of the used words table.
+
+        Args:
+            user_id (str): The ID of the user.
+            word (str): The word that was saved as used.
+        """
+        user_info = self.user_data.get(user_id)
+        if user_info is not None and word is not None:
+            user_info['used_set'].add(word)
+            index = user_info['pool_index'].get(word)
+            if index is not None:
+                user_info['live_mask'][index] = False
 
     def get_user_word_pool(self, user_id):
         """Get the current word pool for the specified user.
@@ -145,26 +313,24 @@ class WordGame:
         Returns:
             tuple: Three lists containing level1, level2, and level3 words respectively.
         """
-        level1_words = []
-        level2_words = []
-        level3_words = []
+        levels = {'level1': [], 'level2': [], 'level3': []}
 
         try:
             with open(csv_path, newline='', encoding='utf-8') as csvfile:
-                first_line = csvfile.readline().strip()
-                delimiter = '\t' if '\t' in first_line else ',' if ',' in first_line else None
-
+                # Let the sniffer pick the delimiter from a sample instead of guessing from the header line
+                sample = csvfile.read(4096)
                 csvfile.seek(0)
-                reader = csv.DictReader(csvfile, delimiter=delimiter)
-
-                for row in reader:
-                    if row['level1']:
-                        level1_words.append(row['level1'].strip())
-                    if row['level2']:
-                        level2_words.append(row['level2'].strip())
-                    if row['level3']:
-                        level3_words.append(row['level3'].strip())
-            return level1_words, level2_words, level3_words
+                try:
+                    dialect = csv.Sniffer().sniff(sample, delimiters=',\t;')
+                except csv.Error:
+                    dialect = csv.excel
+
+                for row in csv.DictReader(csvfile, dialect=dialect):
+                    for level, words in levels.items():
+                        word = (row.get(level) or '').strip()
+                        if word:
+                            words.append(word)
+            return levels['level1'], levels['level2'], levels['level3']
         except FileNotFoundError:
             print(f"Error: The file {csv_path} was not found.")
             return [], [], []
@@ -181,12 +347,14 @@ class WordGame:
         # Add level 2 words if score is between 100 and 200 and not yet merged
         if 100 <= score < 200 and not user_info['level2_merged']:
             user_info['word_pool'] += self.level2_words
+            self.build_pool_arrays(user_info)
             user_info['level2_merged'] = True
             user_info['current_level'] = 2
         
         # Add level 3 words if score is 200 or more and not yet merged
         elif score >= 200 and not user_info['level3_merged']:
             user_info['word_pool'] += self.level3_words
+            self.build_pool_arrays(user_info)
             user_info['level3_merged'] = True
             user_info['current_level'] = 3
 
@@ -208,6 +376,8 @@ class WordGame:
             user_info['word_pool'] = self.level3_words[:]
             user_info['current_level'] = 1
 
+        self.build_pool_arrays(user_info)
+
     def check_round(self, user_id):
         """Check the current round of the game for the user.
 
@@ -233,18 +403,129 @@ class WordGame:
         Returns:
             bool: True if word is saved successfully, False otherwise.
         """
-        return db.save_thrown_word(user_id, thrown_word)
+        saved = db.save_thrown_word(user_id, thrown_word)
+        if saved:
+            self.mark_word_used(user_id, thrown_word)
+        return saved
+
+    def save_thrown_word_in_background(self, user_id, thrown_word):
+        """Queue the thrown word for saving on the background writer.
+
+        The in-memory used words mirror is updated immediately so the word is not thrown again.
+
+        Args:
+            user_id (str): The ID of the user for whom to save the word.
+            thrown_word (str): The word thrown by the AI.
+        """
+        self.mark_word_used(user_id, thrown_word)
+        self._writer.submit(db.save_thrown_word, user_id, thrown_word)
+
+    def flush_writes(self):
+        """Block until every write queued on the background writer has been applied."""
+        self._writer.submit(lambda: None).result()
+
+    def encode_words(self, words, batch_size=32):
+        """Run the SentenceTransformer model on a batch of words.
+
+        Args:
+            words (list): The words to be embedded.
+            batch_size (int, optional): Batch size for the forward passes. Defaults to 32.
+
+        Returns:
+            numpy.ndarray: A float32 matrix with one L2-normalized embedding per row.
+        """
+        with torch.inference_mode():
+            embeddings = self.model.encode(
+                words, batch_size=batch_size, convert_to_numpy=True, normalize_embeddings=True, device=self.device
+            )
+        # FP16 models return float16 arrays; keep the dot products in float32
+        return embeddings.astype(np.float32, copy=False)
+
+    def encode_words_fast(self, words):
+        """Embed a few words with a direct tokenize, forward, mean-pool and normalize pass.
+
+        Skips the per-call overhead of ``SentenceTransformer.encode`` (input sorting,
+        DataLoader-style batching, progress handling), which dominates for one or two words.
+
+        Args:
+            words (list): The words to be embedded.
+
+        Returns:
+            numpy.ndarray: A float32 matrix with one L2-normalized embedding per row.
+        """
+        max_seq_length = self.model.max_seq_length  # Also triggers the lazy model load
+        if self.device.type == 'cuda':
+            inputs = self._tokenizer(
+                words, padding='max_length', truncation=True, max_length=COMPILED_SEQ_LENGTH, return_tensors='pt'
+            ).to(self.device)
+        else:
+            inputs = self._tokenizer(
+                words, padding=True, truncation=True, max_length=max_seq_length, return_tensors='pt'
+            ).to(self.device)
+        with torch.inference_mode():
+            embeddings = self._embed_tokens(dict(inputs))
+        return embeddings.cpu().numpy()
+
+    def embed_tokens(self, inputs):
+        """Run the transformer on tokenized words, then mean-pool and L2-normalize the token embeddings.
+
+        Args:
+            inputs (dict): Tokenizer output tensors on the model's device.
+
+        Returns:
+            torch.Tensor: A float32 tensor with one L2-normalized embedding per row.
+        """
+        token_embeddings = self._auto_model(**inputs).last_hidden_state
+        mask = inputs['attention_mask'].unsqueeze(-1).to(token_embeddings.dtype)
+        embeddings = (token_embeddings * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1e-9)
+        return torch.nn.functional.normalize(embeddings.float(), dim=1)
 
     def get_word_embedding(self, word):
-        """Get the embedding of a word using the SentenceTransformer model.
+        """Get the unit-length embedding of a word, using the precomputed pool embeddings or the LRU cache when available.
 
         Args:
             word (str): The word to be embedded.
 
         Returns:
-            numpy.ndarray: The word's embedding vector.
+            numpy.ndarray: The word's L2-normalized embedding vector.
+        """
+        return self.get_word_embeddings([word])[0]
+
+    def get_word_embeddings(self, words):
+        """Get the unit-length embeddings of several words, encoding all cache misses in one batch.
+
+        Args:
+            words (list): The words to be embedded.
+
+        Returns:
+            list: The L2-normalized embedding vector of each word, in the same order.
         """
-        return self.model.encode([word], device=self.device)
+        embeddings = []
+        missing = []
+        for word in words:
+            embedding = self.word_emb.get(word)
+            if embedding is None:
+                embedding = self.embedding_cache.get(word)
+                if embedding is not None:
+                    self.embedding_cache.move_to_end(word)
+                elif word not in missing:
+                    missing.append(word)
+            embeddings.append(embedding)
+
+        if missing:
+            # A single forward pass over all misses costs about the same as one word
+            encoded = self.encode_words_fast(missing)
+            for word, embedding in zip(missing, encoded):
+                self.embedding_cache[word] = embedding
+            while len(self.embedding_cache) > EMBEDDING_CACHE_SIZE:
+                self.embedding_cache.popitem(last=False)
+            new_embeddings = dict(zip(missing, encoded))
+            embeddings = [
+                new_embeddings[word] if embedding is None else embedding
+                for word, embedding in zip(words, embeddings)
+            ]
+
+        return embeddings
 
     def calculate_similarity(self, word1, word2):
         """Calculate the cosine similarity between two words.
@@ -256,9 +537,9 @@ class WordGame:
         Returns:
             float: The cosine similarity score.
         """
-        vec1 = self.get_word_embedding(word1)
-        vec2 = self.get_word_embedding(word2)
-        return cosine_similarity(vec1, vec2)[0][0]
+        vec1, vec2 = self.get_word_embeddings([word1, word2])
+        # The embeddings are L2-normalized, so their dot product is the cosine similarity
+        return float(np.dot(vec1.ravel(), vec2.ravel()))
 
     def throw_word_to_user(self, user_id):
         """Provide a word to the user, excluding those already used.
@@ -269,29 +550,40 @@ class WordGame:
         Returns:
             str or None: The word thrown to the user, or None if no words are available.
         """
-        word_pool = self.get_user_word_pool(user_id)
-        used_words = self.get_used_words_by_user_id(user_id)
-        
-        word_pool_set = set(word_pool)
-        used_words_set = set(used_words)
-
-        available_words = list(word_pool_set - used_words_set)
+        if user_id not in self.user_data:
+            self.initialize_user_word_pool(user_id)
+        user_info = self.user_data[user_id]
+        thrown_word = self.pick_unused_word(user_info)
 
-        if not available_words:
+        if thrown_word is None:
             self.increment_round_count(user_id)
             self.clear_used_words_by_user(user_id)
             self.reload_word_pool(user_id)
-            word_pool = self.get_user_word_pool(user_id)
-            used_words = set(self.get_used_words_by_user_id(user_id))
-            available_words = [word for word in self.get_user_word_pool(user_id) if word not in used_words]
+            thrown_word = self.pick_unused_word(user_info)
         
-        if not available_words:
+        if thrown_word is None:
             return None
 
-        thrown_word = random.choice(available_words)
-        self.user_data[user_id]['last_thrown_word'] = thrown_word
+        user_info['last_thrown_word'] = thrown_word
         return thrown_word
 
+    def pick_unused_word(self, user_info):
+        """Pick a uniformly random word from the user's pool that has not been used yet.
+
+        Scans the live mask in one vectorised pass and indexes into the fixed pool array,
+        so no list or set of available words is built.
+
+        Args:
+            user_info (dict): The in-memory game data of the user.
+
+        Returns:
+            str or None: The chosen word, or None if every word in the pool is used.
+        """
+        live_indices = np.flatnonzero(user_info['live_mask'])
+        if live_indices.size == 0:
+            return None
+        return user_info['pool_arr'][live_indices[random.randrange(live_indices.size)]]
+
     def save_game_result(self, ai_word, human_word, score):
         """Save the game result to the database using the GameResultDB class.
 
@@ -303,7 +595,27 @@ class WordGame:
         Returns:
             int: The primary key ID of the new game result entry in the database.
         """
-        return db.save_game_result(ai_word, human_word, score)
+        pid = db.save_game_result(ai_word, human_word, score)
+        if pid is not None:
+            self.cache_score(ai_word, human_word, pid, score)
+        return pid
+
+    def save_game_result_with_checkpoint(self, user_id, ai_word, human_word, score):
+        """Save the game result and the user's checkpoint for it in one database transaction.
+
+        Args:
+            user_id (str): The ID of the user.
+            ai_word (str): The AI's word.
+            human_word (str): The human player's word.
+            score (int): The similarity score between the AI and human words.
+
+        Returns:
+            int: The primary key ID of the new game result entry in the database.
+        """
+        pid = db.save_game_result_with_checkpoint(user_id, ai_word, human_word, score)
+        if pid is not None:
+            self.cache_score(ai_word, human_word, pid, score)
+        return pid
 
     def save_used_word(self, user_id, ai_word):
         """Save a used word for a user to the database.
@@ -315,7 +627,9 @@ class WordGame:
         Returns:
             bool: True if word is saved successfully, False otherwise.
         """
-        return db.save_used_word(user_id, ai_word)
+        saved = db.save_used_word(user_id, ai_word)
+        self.mark_word_used(user_id, ai_word)
+        return saved
     
     def get_used_words_by_user_id(self, user_id):
         """Fetch the used words from the database for the given user ID.
@@ -326,6 +640,7 @@ class WordGame:
         Returns:
             list: A list of words used by the user.
         """
+        self.flush_writes()
         return db.get_used_words_by_user_id(user_id)
 
     def save_checkpoint(self, user_id, game_result_id):
@@ -350,7 +665,30 @@ class WordGame:
         Returns:
             tuple: The primary key ID and similarity score if the pair exists; (None, None) otherwise.
         """
-        return db.check_existing_score(ai_word, human_word)
+        key = (ai_word, human_word)
+        cached = self.score_cache.get(key)
+        if cached is not None:
+            self.score_cache.move_to_end(key)
+            return cached
+
+        pid, score = db.check_existing_score(ai_word, human_word)
+        if score is not None:
+            self.cache_score(ai_word, human_word, pid, score)
+        return pid, score
+
+    def cache_score(self, ai_word, human_word, pid, score):
+        """Store a scored word pair in the in-memory LRU score cache.
+
+        Args:
+            ai_word (str): The AI's word.
+            human_word (str): The human player's word.
+            pid (int): The primary key ID of the game result entry.
+            score (int): The similarity score of the pair.
+        """
+        self.score_cache[(ai_word, human_word)] = (pid, score)
+        self.score_cache.move_to_end((ai_word, human_word))
+        if len(self.score_cache) > SCORE_CACHE_SIZE:
+            self.score_cache.popitem(last=False)
 
     def clear_used_words_by_user(self, user_id):
         """Clear all used words for the specified user ID.
@@ -361,7 +699,12 @@ class WordGame:
         Returns:
             bool: True if used words are cleared successfully, False otherwise.
         """
-        return db.clear_used_words_by_user_id(user_id)
+        self.flush_writes()
+        cleared = db.clear_used_words_by_user_id(user_id)
+        if cleared and user_id in self.user_data:
+            self.user_data[user_id]['used_set'].clear()
+            self.user_data[user_id]['live_mask'][:] = True
+        return cleared
 
     def increment_round_count(self, user_id):
         """Increment the round count for the specified user ID.
@@ -396,6 +739,7 @@ class WordGame:
         Returns:
             bool: True if the checkpoint entry exists, False otherwise.
         """
+        self.flush_writes()
         return db.check_checkpoint_entry(user_id, ai_word, human_word)
 
     def clear_user_entries(self, user_id):
@@ -407,6 +751,7 @@ class WordGame:
         Returns:
             bool: True if entries are cleared successfully, False otherwise.
         """
+        self.flush_writes()
         return db.delete_user_entries(user_id)
 
     def get_similarity_score_with_next_word(self, user_id, ai_word, human_word, score, threshold=1.5):
@@ -428,29 +773,35 @@ class WordGame:
         if ai_word != self.user_data[user_id].get('last_thrown_word'):
             raise AIWordError
 
-        self.expand_word_pool(user_id, score)
-        self.updated_score = score
-        self.uid = user_id
+        human_word_lower = human_word.lower()
+        ai_word_lower = self.word_lower.get(ai_word)
+        if ai_word_lower is None:
+            ai_word_lower = ai_word.lower()
 
-        if ai_word.lower() == human_word.lower():
+        if ai_word_lower == human_word_lower:
             return {
                 "error": f"The word '{human_word}' is the same as the AI's word. Please try a different word.",
                 "next_ai_word": ai_word
             }
         
-        pid, sim_score = self.get_existing_or_calculate_score(user_id, ai_word, human_word)
+        # The embedding model is uncased, so case variants of the human word share one stored pair.
+        # Repeat pairs are answered from the score cache without touching the model.
+        pid, sim_score = self.get_existing_or_calculate_score(user_id, ai_word, human_word_lower)
 
-        if sim_score >= threshold:
-            self.updated_score += sim_score
-        else:
+        if sim_score < threshold:
+            self.updated_score = score
             return {
                 "similarity_score": sim_score,
                 "next_ai_word": ai_word,
-                "updated_score": self.updated_score
+                "updated_score": score
             }
 
+        self.updated_score = score + sim_score
+
+        # The pool only matters when a new word is thrown, so it is expanded just before that
+        self.expand_word_pool(user_id, score)
         next_ai_word = self.throw_word_to_user(user_id)
-        db.save_thrown_word(user_id, next_ai_word)
+        self.save_thrown_word_in_background(user_id, next_ai_word)
 
         return {
             "similarity_score": sim_score,
@@ -474,7 +825,7 @@ class WordGame:
         if existing_score is not None:
             round = self.check_round(user_id)
             if round == 0:
-                self.save_checkpoint(user_id, pid)
+                self._writer.submit(self.save_checkpoint, user_id, pid)
                 return pid, existing_score
             
             elif round == 1:
@@ -482,14 +833,14 @@ class WordGame:
                 if entries:
                     raise SameInputError
                 else:
-                    self.save_checkpoint(user_id, pid)
+                    self._writer.submit(self.save_checkpoint, user_id, pid)
                     return pid, existing_score
         
         elif existing_score is None:
             similarity = self.calculate_similarity(ai_word, human_word)
             sim_score = int(similarity * 10)
-            pid = self.save_game_result(ai_word, human_word, sim_score)
-            self.save_checkpoint(user_id, pid)
+            # The new pid is needed for the checkpoint, so both rows go in one inline transaction
+            pid = self.save_game_result_with_checkpoint(user_id, ai_word, human_word, sim_score)
             return pid, sim_score
         return None, 0
     